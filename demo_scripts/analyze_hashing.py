@@ -1,4 +1,5 @@
 import hashlib
+import json
 import re
 from pathlib import Path
 
@@ -19,14 +20,14 @@ design_names = []
 dataset_names = []
 n_modules = []
 for design in test_dataset.index:
-    num_modules_fp = (
+    module_count_fp = (
         test_dataset.designs_dir
         / design["design_name"]
         / "flows"
         / "module_count"
-        / "num_modules.txt"
+        / "flow.json"
     )
-    n_modules.append(int(num_modules_fp.read_text().strip()))
+    n_modules.append(json.loads(module_count_fp.read_text())["num_modules"])
     source_files = test_dataset.get_design_source_files(design["design_name"])
     for fp in source_files:
         corpus_fps.append(fp)
@@ -100,6 +100,8 @@ class DatasetRetriever:
             if design_dir.exists():
                 shutil.rmtree(design_dir)
 
+        self.design_dataset.rebuild_index()
+
 
 class OpencoresDatasetRetriever(DatasetRetriever):
     dataset_name = "opencores"
@@ -132,6 +134,7 @@ class OpencoresDatasetRetriever(DatasetRetriever):
             metadata["dataset_type"] = self.dataset_type
             metadata_fp = design_dir / "design.json"
             metadata_fp.write_text(json.dumps(metadata, indent=4))
+            self.design_dataset.append_index_entry(metadata)
 
             aux_files_dir = design_dir / "aux_files"
             aux_files_dir.mkdir(parents=True, exist_ok=True)
@@ -194,6 +197,7 @@ class HW2VecDatasetRetriever(DatasetRetriever):
             metadata["dataset_type"] = self.dataset_type
             metadata_fp = design_dir / "design.json"
             metadata_fp.write_text(json.dumps(metadata, indent=4))
+            self.design_dataset.append_index_entry(metadata)
 
             source_file_dir = design_dir / "sources"
             source_file_dir.mkdir(parents=True, exist_ok=True)
@@ -271,6 +275,7 @@ class VTRDatasetRetriever(DatasetRetriever):
             metadata["dataset_type"] = self.dataset_type
             metadata_fp = design_dir / "design.json"
             metadata_fp.write_text(json.dumps(metadata, indent=4))
+            self.design_dataset.append_index_entry(metadata)
 
             source_file_dir = design_dir / "sources"
             source_file_dir.mkdir(parents=True, exist_ok=True)
@@ -324,6 +329,7 @@ class KoiosDatasetRetriever(DatasetRetriever):
             metadata["dataset_type"] = self.dataset_type
             metadata_fp = design_dir / "design.json"
             metadata_fp.write_text(json.dumps(metadata, indent=4))
+            self.design_dataset.append_index_entry(metadata)
 
             source_file_dir = design_dir / "sources"
             source_file_dir.mkdir(parents=True, exist_ok=True)
@@ -379,6 +385,7 @@ class EPFLDatasetRetriever(DatasetRetriever):
             metadata["dataset_type"] = self.dataset_type
             metadata_fp = design_dir / "design.json"
             metadata_fp.write_text(json.dumps(metadata, indent=4))
+            self.design_dataset.append_index_entry(metadata)
 
             source_file_dir = design_dir / "sources"
             source_file_dir.mkdir(parents=True, exist_ok=True)
@@ -419,6 +426,7 @@ class OPDBDatasetRetriever(DatasetRetriever):
             metadata["dataset_type"] = self.dataset_type
             metadata_fp = design_dir / "design.json"
             metadata_fp.write_text(json.dumps(metadata, indent=4))
+            self.design_dataset.append_index_entry(metadata)
 
             source_file_dir = design_dir / "sources"
             source_file_dir.mkdir(parents=True, exist_ok=True)
@@ -470,6 +478,7 @@ class ISCAS85DatasetRetriever(DatasetRetriever):
                 # with open(metadata_fp, "w") as f:
                 #     json.dump(metadata, f, indent=4)
                 metadata_fp.write_text(json.dumps(metadata, indent=4))
+                self.design_dataset.append_index_entry(metadata)
 
                 source_file_dir = design_dir / "sources"
                 source_file_dir.mkdir(parents=True, exist_ok=True)
@@ -524,6 +533,7 @@ class ISCAS89DatasetRetriever(DatasetRetriever):
                 metadata["dataset_type"] = self.dataset_type
                 metadata_fp = design_dir / "design.json"
                 metadata_fp.write_text(json.dumps(metadata, indent=4))
+                self.design_dataset.append_index_entry(metadata)
 
                 source_file_dir = design_dir / "sources"
                 source_file_dir.mkdir(parents=True, exist_ok=True)
@@ -574,6 +584,7 @@ class LGSynth89DatasetRetriever(DatasetRetriever):
                 metadata["dataset_type"] = self.type
                 metadata_fp = design_dir / "design.json"
                 metadata_fp.write_text(json.dumps(metadata, indent=4))
+                self.design_dataset.append_index_entry(metadata)
 
                 source_file_dir = design_dir / "sources"
                 source_file_dir.mkdir(parents=True, exist_ok=True)
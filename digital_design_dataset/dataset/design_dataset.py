@@ -1,19 +1,32 @@
+import bisect
+import functools
 import json
+import mmap
 import operator
 import os
 import re
 import shutil
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
-import networkx as nx
-import tqdm
-from github import Auth, Github
-from joblib import Parallel, delayed
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from digital_design_dataset.flows.design_hierarchy import extract_design_hierarchy
-from digital_design_dataset.flows.verilog_ast import verilog_ast
-from digital_design_dataset.flows.yosys_aig import yosys_aig
+
+# networkx, PyGithub, tqdm, the graph flows (which pull in pandas) and the
+# opt-in asyncio / aiofile loader are slow to import, they are imported where
+# they are used so that importing this
+# module, and starting each flow worker process, stays cheap (hence the
+# PLC0415 noqa on those imports)
+if TYPE_CHECKING:
+    import networkx as nx
+    from github import Github
 
 VERILOG_SOURCE_EXTENSIONS = [".v", ".sv", ".svh", ".vh", ".h", ".inc"]
 VERILOG_SOURCE_EXTENSIONS_SET = set(VERILOG_SOURCE_EXTENSIONS) | {
@@ -42,6 +55,276 @@ SOURCE_FILES_EXTENSIONS_SET = (
 class DirectoryNotEmptyError(Exception): ...
 
 
+def _json_dumps(obj: object, indent: bool = True) -> bytes:
+    # orjson is several times faster on the large AST / AIG graph payloads,
+    # the stdlib is kept as a fallback when it is not installed. Machine-read
+    # outputs are written compact, the small human-read files keep the 4-space
+    # layout of design.json through the stdlib, orjson only indents by 2
+    if indent:
+        return json.dumps(obj, indent=4).encode()
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _json_dumps_line(obj: object) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE,
+        )
+    return json.dumps(obj, separators=(",", ":")).encode() + b"\n"
+
+
+def write_graph_jsonl(graph: "nx.Graph", fp: Path) -> None:
+    """Writes a graph as JSON lines, one graph header line followed by one
+    line per node and one line per link. Node and link attributes are stored
+    under the "data" key of each line.
+
+    Unlike `nx.node_link_data`, this never builds the whole graph as a single
+    nested dict, so large graphs can be written and read back in a streaming
+    fashion.
+
+    Args:
+    ----
+        graph (nx.Graph): The graph to write.
+        fp (Path): The path of the output `.jsonl` file.
+
+    """
+    with fp.open("wb") as f:
+        f.write(
+            _json_dumps_line({
+                "type": "graph",
+                "directed": graph.is_directed(),
+                "multigraph": graph.is_multigraph(),
+                "graph": graph.graph,
+            }),
+        )
+        for node, node_data in graph.nodes(data=True):
+            f.write(_json_dumps_line({"type": "node", "id": node, "data": node_data}))
+        if graph.is_multigraph():
+            for source, target, key, edge_data in graph.edges(keys=True, data=True):
+                f.write(
+                    _json_dumps_line({
+                        "type": "link",
+                        "source": source,
+                        "target": target,
+                        "key": key,
+                        "data": edge_data,
+                    }),
+                )
+        else:
+            for source, target, edge_data in graph.edges(data=True):
+                f.write(
+                    _json_dumps_line({
+                        "type": "link",
+                        "source": source,
+                        "target": target,
+                        "data": edge_data,
+                    }),
+                )
+
+
+def _json_loads(data: bytes) -> dict:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _load_design_json(design_json_fp: str | Path) -> dict:
+    # str paths and a plain open, this runs once per design on index rebuilds
+    with open(design_json_fp, "rb") as f:  # noqa: PTH123, FURB101
+        return _json_loads(f.read())
+
+
+def _io_max_workers() -> int:
+    # thread count for pools doing many small file reads / writes, which are
+    # I/O bound so threads scale past the number of CPUs
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def _load_design_jsons_threaded(design_json_fps: list[str]) -> list[dict]:
+    with ThreadPoolExecutor(max_workers=_io_max_workers()) as executor:
+        return list(executor.map(_load_design_json, design_json_fps))
+
+
+async def _load_design_jsons_async(
+    design_json_fps: list[str],
+    n_workers: int = 64,
+) -> list[dict]:
+    # aiofile submits the reads through caio, which batches them with
+    # io_uring / linux aio when the kernel supports it. A fixed pool of
+    # workers drains a queue, rather than one coroutine per file
+    import asyncio  # noqa: PLC0415
+
+    import aiofile  # noqa: PLC0415
+
+    queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue()
+    for i, design_json_fp in enumerate(design_json_fps):
+        queue.put_nowait((i, design_json_fp))
+    designs: list[dict] = [{}] * len(design_json_fps)
+
+    async def worker() -> None:
+        while not queue.empty():
+            i, design_json_fp = queue.get_nowait()
+            async with aiofile.async_open(design_json_fp, "rb") as f:
+                designs[i] = _json_loads(await f.read())
+
+    async with asyncio.TaskGroup() as task_group:
+        for _ in range(min(n_workers, len(design_json_fps))):
+            task_group.create_task(worker())
+    return designs
+
+
+def _load_design_jsons(
+    design_json_fps: list[str],
+    use_aiofile: bool = False,
+) -> list[dict]:
+    # the thread pool is the default, in benchmarks aiofile was several times
+    # slower for small design.json files and is only used on request
+    if use_aiofile:
+        import asyncio  # noqa: PLC0415
+
+        try:
+            import aiofile  # noqa: F401, PLC0415
+        except ImportError:
+            raise ImportError("use_aiofile requires the aiofile package") from None
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(_load_design_jsons_async(design_json_fps))
+        # already inside an event loop (e.g. a notebook), asyncio.run would fail
+    return _load_design_jsons_threaded(design_json_fps)
+
+
+def _count_line_endings(data: bytes, end: int) -> int:
+    # counts the "\n", "\r" and "\r\n" line endings that start in data[:end],
+    # like universal newlines in text mode. data may run one byte past end so
+    # that a "\r\n" split at end is counted once, by the slice it starts in
+    n = data.count(b"\n", 0, end)
+    n_cr = data.count(b"\r", 0, end)
+    if n_cr:
+        n += n_cr - data.count(b"\r\n", 0, end + 1)
+    return n
+
+
+def _count_lines(fp: Path, chunk_size: int = 1 << 20) -> int:
+    # counts line endings in binary rather than materializing every line, a
+    # trailing line without a line ending is still counted
+    with fp.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= chunk_size:
+            # mmap setup is not worth it for a single read
+            data = f.read()
+            n = _count_line_endings(data, len(data))
+            last_byte = data[-1:]
+        else:
+            # let the kernel page the file in lazily, mmap has no count()
+            # so the mapping is counted in chunk_size slices
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                n = sum(
+                    _count_line_endings(m[start : start + chunk_size + 1], chunk_size)
+                    for start in range(0, size, chunk_size)
+                )
+                last_byte = m[-1:]
+    if last_byte not in {b"", b"\n", b"\r"}:
+        n += 1
+    return n
+
+
+def _has_extension(file_name: str, ext_set: set[str] | frozenset[str]) -> bool:
+    # cheaper than building a Path just to read its suffix
+    dot = file_name.rfind(".")
+    return dot >= 0 and file_name[dot:] in ext_set
+
+
+def _collect_sources(
+    sources_dir: Path | str,
+    ext_set: set[str] | None = None,
+) -> list[Path]:
+    # single os.scandir pass over the sources, optionally keeping only the
+    # files whose extension is in ext_set
+    sources_fps = []
+    with os.scandir(sources_dir) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            if ext_set is not None and not _has_extension(entry.name, ext_set):
+                continue
+            sources_fps.append(Path(entry.path))
+    return sources_fps
+
+
+def _atomic_write_bytes(fp: Path, data: bytes) -> None:
+    # readers never observe a partially written file
+    tmp_fp = fp.with_name(fp.name + ".tmp")
+    tmp_fp.write_bytes(data)
+    tmp_fp.replace(fp)
+
+
+def _sync_design_flows(
+    designs_dir: str,
+    design: dict,
+    built_flow_name: str | None = None,
+) -> dict:
+    # merges the flow.json of every built flow into the "flows" entry of a
+    # design.json. Other entries are kept while their flow directory exists,
+    # except for the flow that was just built, which resets its directory
+    # and only counts as built once it wrote its flow.json
+    design_dir = Path(designs_dir, design["design_name"])
+    flows_dir = design_dir / "flows"
+
+    flows = {
+        flow_name: flow_metadata
+        for flow_name, flow_metadata in design.get("flows", {}).items()
+        if flow_name != built_flow_name and (flows_dir / flow_name).is_dir()
+    }
+    if flows_dir.is_dir():
+        with os.scandir(flows_dir) as it:
+            flow_json_fps = sorted(
+                Path(entry.path, "flow.json") for entry in it if entry.is_dir()
+            )
+        for flow_json_fp in flow_json_fps:
+            if not flow_json_fp.is_file():
+                continue
+            flow_metadata = _load_design_json(flow_json_fp)
+            flows[flow_metadata["flow_name"]] = {
+                "flow_name": flow_metadata["flow_name"],
+                "flow_type": flow_metadata["flow_type"],
+            }
+
+    design_metadata = dict(design)
+    design_metadata.pop("flows", None)
+    if flows:
+        design_metadata["flows"] = flows
+    if design_metadata != design:
+        # same layout as the design.json written by the dataset retrievers
+        _atomic_write_bytes(
+            design_dir / "design.json",
+            json.dumps(design_metadata, indent=4).encode(),
+        )
+    return design_metadata
+
+
+def _reset_flow_dir(flow_dir: Path, expected_files: list[str]) -> None:
+    # flows with a fixed set of outputs only need their previous outputs
+    # removed, not the whole directory torn down and re-created
+    flow_dir.mkdir(parents=True, exist_ok=True)
+    for file_name in expected_files:
+        (flow_dir / file_name).unlink(missing_ok=True)
+
+
+def _clear_dir(path: Path | str) -> None:
+    # removes everything inside of path but keeps path itself
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                _clear_dir(entry.path)
+                os.rmdir(entry.path)  # noqa: PTH106
+            else:
+                os.unlink(entry.path)  # noqa: PTH108
+
+
 def make_dir_if_not_empty(path: Path) -> None:
     if not path.exists():
         path.mkdir(parents=True, exist_ok=True)
@@ -58,6 +341,7 @@ class DesignDataset:
         dataset_dir: Path,
         overwrite: bool = False,
         gh_token: str | None = None,
+        use_aiofile: bool = False,
     ) -> None:
         self.dataset_dir = dataset_dir
 
@@ -66,12 +350,43 @@ class DesignDataset:
 
         self.dataset_dir.mkdir(parents=True, exist_ok=True)
         self.designs_dir.mkdir(parents=True, exist_ok=True)
+        # plain str copy for the hot os.scandir / os.walk loops
+        self._designs_dir_str = str(self.designs_dir)
 
         self.gh_token = gh_token
-        if self.gh_token is not None:
-            self.gh_api = Github(auth=Auth.Token(self.gh_token))
-        else:
-            self.gh_api = Github()
+        self._gh_api: Github | None = None
+
+        # read design.json files through aiofile (io_uring / linux aio) when
+        # rebuilding the index, instead of a thread pool
+        self.use_aiofile = use_aiofile
+
+        self._index_cache: list[dict] | None = None
+        # mtime and size of the index file when _index_cache was read
+        self._index_file_version: tuple[int, int] | None = None
+        self._designs_by_name: dict[str, dict] | None = None
+        self._designs_by_dataset_name: dict[str, list[dict]] | None = None
+        # design_name -> extension set (None for all files) -> source files
+        self._source_files_cache: (
+            dict[str, dict[frozenset[str] | None, list[Path]]] | None
+        ) = None
+
+    def __getstate__(self) -> dict:
+        # the GitHub client is not needed by flow workers, it is re-created on
+        # first use rather than shipped to every process
+        state = self.__dict__.copy()
+        state["_gh_api"] = None
+        return state
+
+    @property
+    def gh_api(self) -> "Github":
+        if self._gh_api is None:
+            from github import Auth, Github  # noqa: PLC0415
+
+            if self.gh_token is not None:
+                self._gh_api = Github(auth=Auth.Token(self.gh_token))
+            else:
+                self._gh_api = Github()
+        return self._gh_api
 
     @property
     def root_dir(self) -> Path:
@@ -83,7 +398,7 @@ class DesignDataset:
 
     @property
     def index_path(self) -> Path:
-        return self.dataset_dir / "index.json"
+        return self.dataset_dir / "index.jsonl"
 
     @property
     def does_index_exist(self) -> bool:
@@ -91,19 +406,192 @@ class DesignDataset:
 
     @property
     def index(self) -> list[dict]:
-        designs = []
-        for design_dir in self.designs_dir.iterdir():
-            design_json_fp = design_dir / "design.json"
-            with design_json_fp.open() as f:
-                design = json.load(f)
-            designs.append(design)
-        designs = sorted(designs, key=operator.itemgetter("design_name"))
-        return designs
-
-    # TODO: make index as a generator
+        self._refresh_index()
+        if self._index_cache is None:
+            self._load_index()
+        return self._index_cache
+
     @property
-    def index_generator(self) -> None:
-        raise NotImplementedError
+    def index_generator(self) -> Iterator[dict]:
+        # streams the index file one design at a time (unsorted, uncached),
+        # the file never holds more than one entry per design
+        self._refresh_index()
+        with self.index_path.open("rb") as f:
+            for line in f:
+                yield _json_loads(line)
+
+    def _load_index(self) -> None:
+        index_stat = self.index_path.stat()
+        with self.index_path.open("rb") as f:
+            designs = [_json_loads(line) for line in f]
+        designs.sort(key=operator.itemgetter("design_name"))
+        self._index_cache = designs
+        self._index_file_version = (index_stat.st_mtime_ns, index_stat.st_size)
+
+    def _refresh_index(self) -> None:
+        # adding or removing a design directory updates the mtime of the
+        # designs directory, and the index is always written after the
+        # design.json of the designs it lists. A designs directory newer than
+        # the index file means designs were added or deleted outside of this
+        # class, e.g. by hand, so the index is rebuilt. An index file that
+        # changed since it was read, e.g. rebuilt by another `DesignDataset`
+        # on the same directory, is only re-read
+        try:
+            index_stat = self.index_path.stat()
+        except FileNotFoundError:
+            self.rebuild_index()
+            return
+        if self.designs_dir.stat().st_mtime_ns > index_stat.st_mtime_ns:
+            self.rebuild_index()
+        elif (index_stat.st_mtime_ns, index_stat.st_size) != self._index_file_version:
+            self.invalidate_index()
+
+    def rebuild_index(self) -> None:
+        """Rebuilds the index file from the `design.json` of every design in
+        the designs directory.
+        """
+        with os.scandir(self._designs_dir_str) as it:
+            design_json_fps = [
+                os.path.join(entry.path, "design.json")  # noqa: PTH118
+                for entry in it
+                if entry.is_dir()
+            ]
+
+        designs = _load_design_jsons(design_json_fps, use_aiofile=self.use_aiofile)
+        designs.sort(key=operator.itemgetter("design_name"))
+        self._write_index(designs)
+
+    def _write_index(self, designs: list[dict]) -> None:
+        _atomic_write_bytes(
+            self.index_path,
+            b"".join(_json_dumps_line(design) for design in designs),
+        )
+        self.invalidate_index()
+        self._index_cache = designs
+        index_stat = self.index_path.stat()
+        self._index_file_version = (index_stat.st_mtime_ns, index_stat.st_size)
+
+    def rebuild_design_metadata(
+        self,
+        design_names: list[str] | None = None,
+        built_flow_name: str | None = None,
+    ) -> None:
+        """Records the flows built for each design in its `design.json`, based
+        on the `flows/*/flow.json` files in the design directory, and updates
+        the index to match.
+
+        Flows only write their own `flow.json`, so that designs can be built
+        in parallel without a read-modify-write of the shared `design.json`.
+        `Flow.build_flow_parallel` calls this once for the designs it built,
+        also when the build fails partway. Calling `Flow.build_flow_single`
+        directly records nothing until this is called.
+
+        Existing `"flows"` entries are kept, including ones from flows that do
+        not write a `flow.json`, and are only dropped once their flow
+        directory no longer exists. The entry of `built_flow_name` is dropped
+        too wherever its directory holds no `flow.json`, e.g. after the flow
+        failed on that design.
+
+        Args:
+        ----
+            design_names (list[str] | None): The designs to update, all
+            designs in the index if None.
+            built_flow_name (str | None): The flow that was just built for
+            these designs, if any.
+
+        """
+        if design_names is None:
+            designs = self.index
+        else:
+            designs = [
+                design
+                for design in map(self.get_design_metadata_by_design_name, design_names)
+                if design is not None
+            ]
+
+        with ThreadPoolExecutor(max_workers=_io_max_workers()) as executor:
+            updated_designs = list(
+                executor.map(
+                    functools.partial(
+                        _sync_design_flows,
+                        self._designs_dir_str,
+                        built_flow_name=built_flow_name,
+                    ),
+                    designs,
+                ),
+            )
+
+        updated_designs_by_name = {
+            design["design_name"]: design for design in updated_designs
+        }
+        self._write_index([
+            updated_designs_by_name.get(design["design_name"], design)
+            for design in self.index
+        ])
+
+    def append_index_entry(self, design: dict) -> None:
+        """Adds the metadata of a newly written design to the index file.
+
+        Args:
+        ----
+            design (dict): The design metadata, as written to its `design.json`.
+
+        """
+        if not self.does_index_exist:
+            # the design.json is already on disk, so the rebuild picks it up
+            self.rebuild_index()
+            return
+
+        # the cached index is kept in step with the file rather than dropped,
+        # so adding a whole dataset reads the index file at most once. It is
+        # not refreshed here, the design directory that was just created
+        # makes the designs directory newer than the index file
+        index_stat = self.index_path.stat()
+        if (
+            self._index_cache is None
+            or (index_stat.st_mtime_ns, index_stat.st_size) != self._index_file_version
+        ):
+            self._load_index()
+        designs = self._index_cache
+        design_name = design["design_name"]
+        i = bisect.bisect_left(
+            designs,
+            design_name,
+            key=operator.itemgetter("design_name"),
+        )
+        if i < len(designs) and designs[i]["design_name"] == design_name:
+            # re-added design, the index is rewritten rather than holding two
+            # entries for the same design
+            self._write_index([*designs[:i], design, *designs[i + 1 :]])
+            return
+
+        with self.index_path.open("ab") as f:
+            f.write(_json_dumps_line(design))
+        designs.insert(i, design)
+        self._designs_by_name = None
+        self._designs_by_dataset_name = None
+        if self._source_files_cache is not None:
+            self._source_files_cache.pop(design_name, None)
+        index_stat = self.index_path.stat()
+        self._index_file_version = (index_stat.st_mtime_ns, index_stat.st_size)
+
+    def invalidate_index(self) -> None:
+        """Drops the in-memory index so that the next access re-reads the index
+        file. Designs directories that were added or removed are picked up on
+        the next access, use `rebuild_index` instead after a `design.json` is
+        modified.
+        """
+        self._index_cache = None
+        self._designs_by_name = None
+        self._designs_by_dataset_name = None
+        self._source_files_cache = None
+
+    def _build_index_lookups(self) -> None:
+        designs_by_dataset_name = defaultdict(list)
+        for design in self.index:
+            designs_by_dataset_name[design["dataset_name"]].append(design)
+        self._designs_by_name = {design["design_name"]: design for design in self.index}
+        self._designs_by_dataset_name = dict(designs_by_dataset_name)
 
     def get_design_metadata_by_design_name(self, design_name: str) -> dict | None:
         """Retrieves the metadata of a design based on its design name.
@@ -117,11 +605,11 @@ class DesignDataset:
             dict | None: The metadata of the design if found, None otherwise.
 
         """
-        metadata = None
-        for design in self.index:
-            if design["design_name"] == design_name:
-                metadata = design
-                break
+        # drops the lookups too if designs were added or removed on disk
+        self._refresh_index()
+        if self._designs_by_name is None:
+            self._build_index_lookups()
+        metadata = self._designs_by_name.get(design_name)
         return metadata
 
     def get_design_metadata_by_design_name_regex(
@@ -142,10 +630,11 @@ class DesignDataset:
             designs that match the pattern.
 
         """
+        design_name_regex = re.compile(design_name_regex_pattern)
         metadata = [
             design
             for design in self.index
-            if re.match(design_name_regex_pattern, design["design_name"])
+            if design_name_regex.match(design["design_name"])
         ]
         return metadata
 
@@ -163,25 +652,74 @@ class DesignDataset:
             given dataset name.
 
         """
-        metadata = [
-            design for design in self.index if design["dataset_name"] == dataset_name
-        ]
+        # drops the lookups too if designs were added or removed on disk
+        self._refresh_index()
+        if self._designs_by_dataset_name is None:
+            self._build_index_lookups()
+        metadata = list(self._designs_by_dataset_name.get(dataset_name, []))
         return metadata
 
-    def get_design_source_files(self, design_name: str) -> list[Path]:
+    def _build_source_files_cache(self) -> None:
+        # a single walk over the dataset, only descending into the sources
+        # directory of each design
+        designs_dir = self._designs_dir_str
+        source_files_cache = {}
+        for root, dirnames, filenames in os.walk(designs_dir):
+            if root == designs_dir:
+                continue
+            parent_dir, dir_name = os.path.split(root)
+            if parent_dir == designs_dir:
+                dirnames[:] = [d for d in dirnames if d == "sources"]
+            elif dir_name == "sources":
+                dirnames.clear()
+                source_files_cache[os.path.basename(parent_dir)] = {  # noqa: PTH119
+                    None: [Path(root, f) for f in filenames],
+                }
+        self._source_files_cache = source_files_cache
+
+    def warm_source_files_cache(self) -> None:
+        """Lists the source files of every design in a single walk over the
+        dataset, if not done already, e.g. before starting worker processes so
+        that they inherit the listing.
+        """
+        if self._source_files_cache is None:
+            self._build_source_files_cache()
+
+    def get_design_source_files(
+        self,
+        design_name: str,
+        ext_set: set[str] | None = None,
+    ) -> list[Path]:
         """Retrieves the source files for a given design name.
 
         Args:
         ----
             design_name (str): The name of the design.
+            ext_set (set[str] | None): If given, only the source files with
+            one of these extensions are returned.
 
         Returns:
         -------
             list[Path]: A list of Path objects representing the source files.
 
         """
-        design_sources_dir = self.designs_dir / design_name / "sources"
-        source_files = list(design_sources_dir.iterdir())
+        self.warm_source_files_cache()
+
+        design_source_files = self._source_files_cache.get(design_name)
+        if design_source_files is None:
+            # design added after the cache was built
+            design_sources_dir = Path(self._designs_dir_str, design_name, "sources")
+            design_source_files = {None: _collect_sources(design_sources_dir)}
+            self._source_files_cache[design_name] = design_source_files
+
+        ext_key = None if ext_set is None else frozenset(ext_set)
+        if ext_key not in design_source_files:
+            design_source_files[ext_key] = [
+                fp
+                for fp in design_source_files[None]
+                if _has_extension(fp.name, ext_key)
+            ]
+        source_files = list(design_source_files[ext_key])
         return source_files
 
 
@@ -195,11 +733,108 @@ class Flow:
     def build_flow(self, overwrite: bool = False) -> None:
         raise NotImplementedError
 
+    def build_flow_single(
+        self,
+        design: dict[str, Any],
+        overwrite: bool = False,
+    ) -> None:
+        raise NotImplementedError
+
+    def build_flow_parallel(
+        self,
+        designs: list[dict],
+        overwrite: bool = False,
+        n_jobs: int | None = 1,
+        progress: bool = False,
+    ) -> None:
+        try:
+            self._build_designs(
+                designs,
+                overwrite=overwrite,
+                n_jobs=n_jobs,
+                progress=progress,
+            )
+        finally:
+            # flow.json is written last by each flow, so a design the flow
+            # failed on is not recorded as built
+            self.design_dataset.rebuild_design_metadata(
+                [design["design_name"] for design in designs],
+                built_flow_name=self.flow_name,
+            )
+
+    def _build_designs(
+        self,
+        designs: list[dict],
+        overwrite: bool = False,
+        n_jobs: int | None = 1,
+        progress: bool = False,
+    ) -> None:
+        if progress:
+            import tqdm  # noqa: PLC0415
+
+        # same n_jobs convention as joblib, None is a single job and negative
+        # values count back from the number of CPUs
+        if n_jobs is None:
+            n_jobs = 1
+        elif n_jobs < 0:
+            n_jobs = max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+
+        if n_jobs == 1:
+            results = (
+                self.build_flow_single(design, overwrite=overwrite)
+                for design in designs
+            )
+            if progress:
+                results = tqdm.tqdm(results, total=len(designs))
+            for _ in results:
+                pass
+            return
+
+        # the flow (and its dataset) is pickled once per worker by the
+        # initializer, the tasks themselves only carry the small design dict
+        # the source files cache is built up front so that the workers
+        # inherit it instead of each walking the dataset again
+        self.design_dataset.warm_source_files_cache()
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_init_flow_worker,
+            initargs=(self,),
+        ) as executor:
+            results = executor.map(
+                functools.partial(_build_flow_single_worker, overwrite=overwrite),
+                designs,
+                chunksize=8,
+            )
+            if progress:
+                results = tqdm.tqdm(results, total=len(designs))
+            for _ in results:
+                pass
+
+
+# holds the flow of a worker process, set once by its initializer
+_WORKER_STATE: dict[str, Flow] = {}
+
+
+def _init_flow_worker(flow: Flow) -> None:
+    _WORKER_STATE["flow"] = flow
+
+
+def _build_flow_single_worker(design: dict, overwrite: bool = False) -> None:
+    _WORKER_STATE["flow"].build_flow_single(design, overwrite=overwrite)
+
 
 class LineCountFlow(Flow):
     flow_name = "line_count"
     flow_type = "text"
 
+    def __init__(
+        self,
+        design_dataset: DesignDataset,
+        max_file_workers: int = 8,
+    ) -> None:
+        super().__init__(design_dataset)
+        self.max_file_workers = max_file_workers
+
     def build_flow_single(
         self,
         design: dict[str, Any],
@@ -207,18 +842,19 @@ class LineCountFlow(Flow):
     ) -> None:
         # count number of lines in a design
         design_dir = self.design_dataset.designs_dir / design["design_name"]
-        sources_dir = design_dir / "sources"
-        sources_fps = [f for f in sources_dir.iterdir() if f.is_file()]
+        sources_fps = self.design_dataset.get_design_source_files(
+            design["design_name"],
+        )
 
-        lines = 0
-        for source_fp in sources_fps:
-            with source_fp.open() as f:
-                lines += len(f.readlines())
+        # per-file counting is I/O bound, so a thread pool composes with the
+        # outer process pool over designs
+        with ThreadPoolExecutor(max_workers=self.max_file_workers) as executor:
+            lines = sum(executor.map(_count_lines, sources_fps))
 
         flow_dir = design_dir / "flows" / self.flow_name
-        if flow_dir.exists():
-            shutil.rmtree(flow_dir)
-        flow_dir.mkdir(parents=True, exist_ok=True)
+        # num_lines.txt is no longer written, but is still removed if left
+        # over from an older build so it cannot go stale
+        _reset_flow_dir(flow_dir, ["num_lines.txt", "flow.json"])
 
         flow_metadata = {
             "flow_name": self.flow_name,
@@ -226,18 +862,12 @@ class LineCountFlow(Flow):
             "num_lines": lines,
         }
 
-        num_lines = flow_dir / "num_lines.txt"
-        num_lines.write_text(str(lines))
-
         flow_metadata_fp = flow_dir / "flow.json"
-        flow_metadata_fp.write_text(json.dumps(flow_metadata, indent=4))
+        flow_metadata_fp.write_bytes(_json_dumps(flow_metadata))
 
     def build_flow(self, overwrite: bool = False, n_jobs: int = 1) -> None:
         designs = self.design_dataset.index
-        Parallel(n_jobs=n_jobs)(
-            delayed(self.build_flow_single)(design, overwrite=overwrite)
-            for design in designs
-        )
+        self.build_flow_parallel(designs, overwrite=overwrite, n_jobs=n_jobs)
 
 
 class ModuleInfoFlow(Flow):
@@ -255,20 +885,18 @@ class ModuleInfoFlow(Flow):
     ) -> None:
         # count number of modules in a design
         design_dir = self.design_dataset.designs_dir / design["design_name"]
-        sources_dir = design_dir / "sources"
-        sources_fps = [f for f in sources_dir.iterdir() if f.is_file()]
-
-        verilog_sources_fps = [
-            f for f in sources_fps if f.suffix in VERILOG_SOURCE_EXTENSIONS_SET
-        ]
+        verilog_sources_fps = self.design_dataset.get_design_source_files(
+            design["design_name"],
+            VERILOG_SOURCE_EXTENSIONS_SET,
+        )
 
         modules = extract_design_hierarchy(verilog_sources_fps)
         num_modules = len(modules)
 
         flow_dir = design_dir / "flows" / self.flow_name
-        if flow_dir.exists():
-            shutil.rmtree(flow_dir)
-        flow_dir.mkdir(parents=True, exist_ok=True)
+        # the .txt files are no longer written, but are still removed if left
+        # over from an older build so they cannot go stale
+        _reset_flow_dir(flow_dir, ["num_modules.txt", "modules.txt", "flow.json"])
 
         flow_metadata = {
             "flow_name": self.flow_name,
@@ -277,22 +905,17 @@ class ModuleInfoFlow(Flow):
             "num_modules": num_modules,
         }
 
-        num_modules_fp = flow_dir / "num_modules.txt"
-        num_modules_fp.write_text(str(num_modules))
-
-        modules_fp = flow_dir / "modules.txt"
-        modules_fp.write_text("\n".join(modules))
-
         flow_metadata_fp = flow_dir / "flow.json"
-        flow_metadata_fp.write_text(json.dumps(flow_metadata, indent=4))
+        flow_metadata_fp.write_bytes(_json_dumps(flow_metadata))
 
     def build_flow(self, overwrite: bool = False, n_jobs: int = 1) -> None:
         designs = self.design_dataset.index
-        Parallel(n_jobs=n_jobs)(
-            delayed(self.build_flow_single)(design, overwrite=overwrite)
-            for design in tqdm.tqdm(designs)
+        self.build_flow_parallel(
+            designs,
+            overwrite=overwrite,
+            n_jobs=n_jobs,
+            progress=True,
         )
-        self.build_flow_single(designs[0], overwrite=overwrite)
 
 
 class VeribleASTFlow(Flow):
@@ -312,33 +935,23 @@ class VeribleASTFlow(Flow):
         design: dict[str, Any],
         overwrite: bool = False,
     ) -> None:
+        import networkx as nx  # noqa: PLC0415
+
+        from digital_design_dataset.flows.verilog_ast import verilog_ast  # noqa: PLC0415
+
         design_dir = self.design_dataset.designs_dir / design["design_name"]
-        sources_dir = design_dir / "sources"
-        sources_fps = [f for f in sources_dir.iterdir() if f.is_file()]
+        sources_fps = self.design_dataset.get_design_source_files(
+            design["design_name"],
+            VERILOG_SOURCE_EXTENSIONS_SET,
+        )
 
         # TODO: add overwrite functionality
         flow_dir = design_dir / "flows" / self.flow_name
-        if flow_dir.exists():
-            shutil.rmtree(flow_dir)
+        # the per-source AST outputs are not known up front, so clear everything
         flow_dir.mkdir(parents=True, exist_ok=True)
-
-        design_metadata_fp = design_dir / "design.json"
-        with design_metadata_fp.open() as f:
-            design_metadata = json.load(f)
-
-        if "flows" not in design_metadata:
-            design_metadata["flows"] = {}
-
-        flow_metadata = {}
-        flow_metadata["flow_name"] = self.flow_name
-        flow_metadata["flow_type"] = self.flow_type
-        design_metadata["flows"][self.flow_name] = flow_metadata
-
-        design_metadata_fp.write_text(json.dumps(design_metadata, indent=4))
+        _clear_dir(flow_dir)
 
         for source_fp in sources_fps:
-            if source_fp.suffix not in VERILOG_SOURCE_EXTENSIONS_SET:
-                continue
             g_ast = verilog_ast(
                 source_fp,
                 verible_verilog_syntax_bin=self.verible_verilog_syntax_bin,
@@ -348,78 +961,99 @@ class VeribleASTFlow(Flow):
 
             g_ast_json = nx.node_link_data(g_ast)
             g_ast_fp = flow_dir / (source_fp.stem + ".ast.json")
-            g_ast_fp.write_text(json.dumps(g_ast_json, indent=4))
+            g_ast_fp.write_bytes(_json_dumps(g_ast_json, indent=False))
+
+        flow_metadata = {
+            "flow_name": self.flow_name,
+            "flow_type": self.flow_type,
+        }
+        flow_metadata_fp = flow_dir / "flow.json"
+        flow_metadata_fp.write_bytes(_json_dumps(flow_metadata))
 
     def build_flow(self, overwrite: bool = False, n_jobs: int = 1) -> None:
         designs = self.design_dataset.index
-        Parallel(n_jobs=n_jobs)(
-            delayed(self.build_flow_single)(design, overwrite=overwrite)
-            for design in designs
-        )
+        self.build_flow_parallel(designs, overwrite=overwrite, n_jobs=n_jobs)
 
 
 class YosysAIGFlow(Flow):
     flow_name = "yosys_aig"
     flow_type = "graph"
 
-    def __init__(self, design_dataset: DesignDataset, yosys_bin: str = "yosys") -> None:
+    def __init__(
+        self,
+        design_dataset: DesignDataset,
+        yosys_bin: str = "yosys",
+        graph_jsonl: bool = False,
+    ) -> None:
         super().__init__(design_dataset)
         self.yosys_bin = yosys_bin
+        # write the AIG as aig_graph.jsonl (one node / link per line) instead
+        # of a single node-link aig_graph.json, useful for very large graphs
+        self.graph_jsonl = graph_jsonl
 
     def build_flow_single(
         self,
         design: dict[str, Any],
         overwrite: bool = False,
     ) -> None:
+        import networkx as nx  # noqa: PLC0415
+
+        from digital_design_dataset.flows.yosys_aig import yosys_aig  # noqa: PLC0415
+
         design_dir = self.design_dataset.designs_dir / design["design_name"]
-        sources_dir = design_dir / "sources"
-        sources_fps = [f for f in sources_dir.iterdir() if f.is_file()]
-        sources_fps = [
-            f for f in sources_fps if f.suffix in VERILOG_SOURCE_EXTENSIONS_SET
-        ]
+        sources_fps = self.design_dataset.get_design_source_files(
+            design["design_name"],
+            VERILOG_SOURCE_EXTENSIONS_SET,
+        )
 
         # TODO: add overwrite functionality
         flow_dir = design_dir / "flows" / self.flow_name
-        if flow_dir.exists():
-            shutil.rmtree(flow_dir)
-        flow_dir.mkdir(parents=True, exist_ok=True)
-
-        design_metadata_fp = design_dir / "design.json"
-        with design_metadata_fp.open() as f:
-            design_metadata = json.load(f)
-
-        if "flows" not in design_metadata:
-            design_metadata["flows"] = {}
-
-        flow_metadata = {}
-        flow_metadata["flow_name"] = self.flow_name
-        flow_metadata["flow_type"] = self.flow_type
-        design_metadata["flows"][self.flow_name] = flow_metadata
-
-        design_metadata_fp.write_text(json.dumps(design_metadata, indent=4))
+        _reset_flow_dir(
+            flow_dir,
+            [
+                "aig_graph.json",
+                "aig_graph.jsonl",
+                "aig_yosys.json",
+                "stat.txt",
+                "stat.json",
+                "flow.json",
+            ],
+        )
 
         aig_graph, json_data, stat_txt, stat_json = yosys_aig(
             sources_fps,
             yosys_bin=self.yosys_bin,
         )
-        aig_graph_json = nx.node_link_data(aig_graph)
-        aig_graph_fp = flow_dir / "aig_graph.json"
-        aig_graph_fp.write_text(json.dumps(aig_graph_json, indent=4))
+        if self.graph_jsonl:
+            write_graph_jsonl(aig_graph, flow_dir / "aig_graph.jsonl")
+        else:
+            aig_graph_fp = flow_dir / "aig_graph.json"
+            with aig_graph_fp.open("wb") as f:
+                f.write(_json_dumps(nx.node_link_data(aig_graph), indent=False))
 
         aig_yosys_json_fp = flow_dir / "aig_yosys.json"
-        aig_yosys_json_fp.write_text(json.dumps(json_data, indent=4))
+        aig_yosys_json_fp.write_bytes(_json_dumps(json_data, indent=False))
 
         stat_txt_fp = flow_dir / "stat.txt"
         stat_txt_fp.write_text(stat_txt)
 
         stat_json_fp = flow_dir / "stat.json"
-        stat_json_fp.write_text(json.dumps(stat_json, indent=4))
+        stat_json_fp.write_bytes(_json_dumps(stat_json, indent=False))
+
+        flow_metadata = {
+            "flow_name": self.flow_name,
+            "flow_type": self.flow_type,
+        }
+        flow_metadata_fp = flow_dir / "flow.json"
+        flow_metadata_fp.write_bytes(_json_dumps(flow_metadata))
 
     def build_flow(self, overwrite: bool = False, n_jobs: int = 1) -> None:
         designs = self.design_dataset.index
-        Parallel(n_jobs=n_jobs, backend="loky")(
-            delayed(self.build_flow_single)(design, overwrite=overwrite)
-            for design in tqdm.tqdm(designs)
+        self.build_flow_parallel(
+            designs,
+            overwrite=overwrite,
+            n_jobs=n_jobs,
+            progress=True,
         )
 
 
@@ -436,12 +1070,10 @@ class YosysXilinxSynthFlow(Flow):
         design: dict[str, Any],
         overwrite: bool = False,
     ) -> None:
-        design_dir = self.design_dataset.designs_dir / design["design_name"]
-        sources_dir = design_dir / "sources"
-        sources_fps = [f for f in sources_dir.iterdir() if f.is_file()]
-        sources_fps = [
-            f for f in sources_fps if f.suffix in VERILOG_SOURCE_EXTENSIONS_SET
-        ]
+        self.design_dataset.get_design_source_files(
+            design["design_name"],
+            VERILOG_SOURCE_EXTENSIONS_SET,
+        )
 
 
 class ModuleHierarchyFlow(Flow):
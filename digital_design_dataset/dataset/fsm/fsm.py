@@ -1,5 +1,7 @@
 from typing import List, Optional
 
+import numpy as np
+
 
 class State:
     def __init__(self, name: str, output_assignments: dict):
@@ -28,11 +30,78 @@ class Transistion:
 
 
 class Transitions:
+    # transitions are stored as parallel int32 arrays (struct of arrays) over
+    # interned state / symbol ids rather than a list of Transistion objects,
+    # with a CSR table grouping the transitions by source state
+
     def __init__(self, transitions: List[Transistion]):
-        self.transitions = transitions
+        self.state_ids: dict[str, int] = {}
+        self.symbol_ids: dict[str, int] = {}
+        self.state_names: list[str] = []
+        self.symbol_names: list[str] = []
+
+        n = len(transitions)
+        self.sources = np.empty(n, dtype=np.int32)
+        self.targets = np.empty(n, dtype=np.int32)
+        self.symbols = np.empty(n, dtype=np.int32)
+        for i, t in enumerate(transitions):
+            self.sources[i] = self._intern_state(t.source)
+            self.targets[i] = self._intern_state(t.target)
+            self.symbols[i] = self._intern_symbol(t.symbol)
+
+        # transitions leaving state s are col[indptr[s]:indptr[s + 1]] with the
+        # matching symbols in sym[indptr[s]:indptr[s + 1]]
+        order = np.argsort(self.sources, kind="stable")
+        counts = np.bincount(self.sources, minlength=len(self.state_names))
+        self.indptr = np.zeros(len(self.state_names) + 1, dtype=np.int32)
+        np.cumsum(counts, out=self.indptr[1:])
+        self.col = self.targets[order]
+        self.sym = self.symbols[order]
+
+    def _intern_state(self, name: str) -> int:
+        state_id = self.state_ids.get(name)
+        if state_id is None:
+            state_id = len(self.state_names)
+            self.state_ids[name] = state_id
+            self.state_names.append(name)
+        return state_id
+
+    def _intern_symbol(self, name: str) -> int:
+        symbol_id = self.symbol_ids.get(name)
+        if symbol_id is None:
+            symbol_id = len(self.symbol_names)
+            self.symbol_ids[name] = symbol_id
+            self.symbol_names.append(name)
+        return symbol_id
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def successors(self, state_id: int) -> tuple[np.ndarray, np.ndarray]:
+        # target state ids and symbol ids of the transitions leaving state_id
+        start, end = self.indptr[state_id], self.indptr[state_id + 1]
+        return self.col[start:end], self.sym[start:end]
+
+    @property
+    def transitions(self) -> tuple[Transistion, ...]:
+        # rebuilt from the arrays on every access, a tuple so that it is not
+        # mistaken for mutable storage
+        return tuple(
+            Transistion(
+                self.state_names[source],
+                self.state_names[target],
+                self.symbol_names[symbol],
+            )
+            for source, target, symbol in zip(
+                self.sources.tolist(),
+                self.targets.tolist(),
+                self.symbols.tolist(),
+                strict=True,
+            )
+        )
 
     def __repr__(self):
-        return f"Transitions({self.transitions})"
+        return f"Transitions({list(self.transitions)})"
 
 
 class Output: